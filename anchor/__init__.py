@@ -1,3 +1,37 @@
-from .shower import create_direct, create_reflected, create_shower  # noqa: F401
+import sys as _sys
+import typing as _typing
+from typing import Any as _Any
+from typing import List as _List
 
 __version__ = "0.0.1"
+
+# the names that we lazily re-export from anchor.shower
+_SHOWER_EXPORTS = ["create_direct", "create_reflected", "create_shower"]
+
+# let type checkers see the real signatures of the lazy exports
+if _typing.TYPE_CHECKING:
+    from .shower import create_direct, create_reflected, create_shower  # noqa: F401
+
+if _sys.version_info >= (3, 7):
+
+    def __getattr__(name: str) -> _Any:
+        """
+        Lazily import anchor.shower so that `import anchor` is cheap.
+        """
+        if name in _SHOWER_EXPORTS:
+            from . import shower
+
+            # cache the value so that later lookups skip __getattr__
+            value = getattr(shower, name)
+            globals()[name] = value
+
+            return value
+
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    def __dir__() -> _List[str]:
+        return sorted(set(globals()) | set(_SHOWER_EXPORTS))
+
+
+else:  # module-level __getattr__ (PEP 562) is not supported before 3.7
+    from .shower import create_direct, create_reflected, create_shower  # noqa: F401
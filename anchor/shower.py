@@ -4,17 +4,142 @@ for various geometries and experiments.
 """
 import os
 import os.path as op
-from os.path import dirname, join
-from typing import Any, Optional
+from functools import lru_cache
+from os.path import join
+from typing import TYPE_CHECKING, Any, Optional, Tuple
 
-import igrf as igrf12
-import numpy as np
-
-import zhaires
-from zhaires.path import get_run_directory
+# zhaires, igrf, and numpy are expensive to import so we only
+# import them inside the functions that actually need them
+if TYPE_CHECKING:
+    import zhaires
 
 __all__ = ["create_shower", "create_direct", "create_reflected"]
 
+# the root directory of the anchor repository
+_ROOT = op.dirname(op.dirname(op.abspath(__file__)))
+
+# the directory containing our default Aires input files
+_DEFAULTS = join(_ROOT, "defaults")
+
+# and the default input files for each shower type
+_COMMON_DEFAULT = join(_DEFAULTS, "common_default.inp")
+_REFLECTED_DEFAULT = join(_DEFAULTS, "reflected_default.inp")
+_DIRECT_DEFAULT = join(_DEFAULTS, "direct_default.inp")
+_STRATOSPHERIC_DEFAULT = join(_DEFAULTS, "stratospheric_default.inp")
+
+# the Aires binaries for each of the ZHAireS versions compiled by anchor
+# keyed by (version, binary name)
+_AIRES_BINARIES = {
+    (version, binary): join(_ROOT, "aires", f"aires_{version}_install", "bin", binary)
+    for version in ("direct", "reflected", "stratospheric")
+    for binary in ("Aires", "AiresQ")
+}
+
+# the RASPASS binary that creates the stratospheric special particles
+_RASPASS_BINARY = join(
+    _ROOT, "aires", "aires_stratospheric_install", "bin", "RASPASSprimary"
+)
+
+# the RASPASS special particle for each supported stratospheric primary
+_RASPASS_PRIMARIES = {
+    "proton": "RASPASSProton",
+    "iron": "RASPASSIron",
+    "electron": "RASPASSElectron",
+}
+
+
+@lru_cache(maxsize=None)
+def _assert_program(program: str) -> str:
+    """
+    Check that an Aires binary exists, raising a ValueError if not.
+
+    This is cached so that we only check each binary once per process.
+
+    Parameters
+    ----------
+    program: str
+        The path to the Aires binary.
+
+    Returns
+    -------
+    program: str
+        The (unmodified) path to the Aires binary.
+    """
+    if not op.exists(program):
+        raise ValueError(f"Unable to find {program}")
+
+    return program
+
+
+def _create_directory(directory: str, restart: bool) -> None:
+    """
+    Create a simulation directory, raising a ValueError if it already
+    exists and we are not restarting.
+
+    Parameters
+    ----------
+    directory: str
+        The path to the simulation directory.
+    restart: bool
+        If True, don't error if the simulation directory already exists.
+    """
+    # check whether this simulation has already been created
+    if op.isdir(directory):
+        if restart:
+            print("Simulation directory exists. Restarting...")
+        else:
+            raise ValueError("Simulation already exists. Quitting...")
+        return
+
+    # create the output directory - another process may have created
+    # it since we checked so we only tolerate that when restarting
+    try:
+        os.makedirs(directory, exist_ok=restart)
+    except FileExistsError:
+        raise ValueError("Simulation already exists. Quitting...")
+
+@lru_cache(maxsize=1024)
+def _geomagnetic_field(
+    date: str, lat: float, lon: float, ground: float
+) -> Tuple[float, float, float]:
+    """
+    Evaluate the IGRF magnetic field at a given site and date.
+
+    This is cached as parameter sweeps typically create many
+    showers at the same site.
+
+    Parameters
+    ----------
+    date: str
+        A date string in the form 'YYYY-MM-DD'
+    lat: float
+        The latitude of the site in degrees.
+    lon: float
+        The longitude of the site in degrees.
+    ground: float
+        The ground altitude at the site in km.
+
+    Returns
+    -------
+    total: float
+        The total magnetic field strength in nT.
+    incl: float
+        The inclination of the magnetic field in degrees.
+    decl: float
+        The declination of the magnetic field in degrees.
+    """
+    import igrf as igrf12
+
+    # get the magnetic field for this site
+    B = igrf12.igrf(date, glat=lat, glon=lon, alt_km=ground)
+
+    # extract all three components in a single array (we only
+    # evaluate the field at a single location)
+    total, incl, decl = B[["total", "incl", "decl"]].to_array().values.ravel()
+
+    # and convert them into plain Python floats
+    return float(total), float(incl), float(decl)
+
 
 def create_shower(
     name: str,
@@ -34,7 +159,7 @@ def create_shower(
     default: Optional[str] = None,
     program: Optional[str] = None,
     **kwargs: Any,
-) -> zhaires.Task:
+) -> "zhaires.Task":
     """
     Create a new ZHAireS shower with the given event parameters.
 
@@ -49,6 +174,10 @@ def create_shower(
     found on your PATH. It is recommended to manually set `program` if you
     have multiple Aires/ZHAires version installed.
 
+    This changes the current working directory to the simulation directory
+    as Aires writes its status and scratch files into its working directory.
+    Each shower should therefore be run before the next shower is created.
+
     Parameters
     ----------
     name: str
@@ -90,32 +219,25 @@ def create_shower(
     sim: zhaires.Task
         The created ZHAires simulation that can be run with `sim.run()`.
     """
+    import zhaires
+    from zhaires.path import get_run_directory
+
     # create the simulation directory name
-    directory = join(get_run_directory(), f"{name}")
+    directory = join(get_run_directory(), name)
 
-    # create the output directory
-    try:
-        os.makedirs(directory, exist_ok=True)
-    except Exception as e:
-        if restart:
-            print("Simulation directory exists. Restarting...")
-        else:
-            print(e)
-            raise ValueError("Simulation already exists. Quitting...")
+    # and create the output directory
+    _create_directory(directory, restart)
 
     # get the path to the antenna file if provided before we change directories
     antennas = op.abspath(antenna_file) if antenna_file else None
 
-    # change to the sim directory
+    # change to the sim directory - Aires writes its status and scratch
+    # files into its working directory and zhaires.Task.run() does not
+    # accept one, so we leave the process in the most recent sim directory
     os.chdir(directory)
 
-    # the common defaults file
-    common_default = join(
-        dirname(dirname(__file__)), *("defaults", "common_default.inp")
-    )
-
     # create a new simulation using the ANITA defaults
-    sim = zhaires.Task(program=program, cmdfile=common_default)
+    sim = zhaires.Task(program=program, cmdfile=_COMMON_DEFAULT)
 
     # and load any additional settings from the user provided file
     sim.load_from_file(default)
@@ -140,13 +262,14 @@ def create_shower(
     # and enable this site for the simulation
     sim.site("LatLonAltSite")
 
-    # get the magnetic field for this site
-    B = igrf12.igrf(date, glat=lat, glon=lon, alt_km=ground)
+    # get the magnetic field for this site - we round the site location
+    # so that nearly identical sites share the same cache entry
+    total, incl, decl = _geomagnetic_field(
+        date, round(lat, 4), round(lon, 4), round(ground, 4)
+    )
 
     # and set the magnetic field
-    sim.geomagnetic_field(
-        B["total"].values[0], B["incl"].values[0], B["decl"].values[0]
-    )
+    sim.geomagnetic_field(total, incl, decl)
 
     # setup the thinning
     sim.thinning_energy(thinning, relative=True)
@@ -157,13 +280,17 @@ def create_shower(
     # load the antenna file
     if antennas:
         if op.exists(antennas):
+            import numpy as np
 
             # load the antennas
             x, y, z = np.loadtxt(antennas).T
 
-            # loop over the antennas
-            for i in np.arange(x.size):
-                sim.add_antenna(x[i], y[i], z[i])
+            # bind add_antenna once as antenna files can be large
+            add_antenna = sim.add_antenna
+
+            # and loop over the antennas
+            for xi, yi, zi in zip(x, y, z):
+                add_antenna(xi, yi, zi)
 
         else:  # we were provided a file, but it does not exists
             raise ValueError(f"'antenna-file' does not exist.")
@@ -172,7 +299,7 @@ def create_shower(
     return sim
 
 
-def create_reflected(*args: Any, **kwargs: Any) -> zhaires.Task:
+def create_reflected(*args: Any, **kwargs: Any) -> "zhaires.Task":
     """
     Create a reflected shower using the `reflected_default.inp` file
     and using the reflected ZHAireS version compiled by anchor.
@@ -182,33 +309,27 @@ def create_reflected(*args: Any, **kwargs: Any) -> zhaires.Task:
     """
 
     # make sure default, and program are not in kwargs
-    if "default" in kwargs.keys():
+    if "default" in kwargs:
         raise ValueError(f"Cannot overide `default` file in create_reflected.")
-    if "program" in kwargs.keys():
+    if "program" in kwargs:
         raise ValueError(f"Cannot overide `program` in create_reflected.")
 
-    # the location of the ZHAires default input file
-    default = join(dirname(dirname(__file__)), *("defaults", "reflected_default.inp"))
-
     # if program exists, use that name
     name = "AiresQ" if kwargs.get("model") == "AiresQ" else "Aires"
 
     # and the location of the corresponding Aires binary
-    program = join(
-        dirname(dirname(__file__)), *("aires", "aires_reflected_install", "bin", name)
-    )
+    program = _AIRES_BINARIES[("reflected", name)]
 
     # check that the program exists
-    if not op.exists(program):
-        raise ValueError(f"Unable to find {program}")
+    _assert_program(program)
 
     # and then call create_shower with the given default card
     return create_shower(
-        *args, program=program, default=default, **kwargs
+        *args, program=program, default=_REFLECTED_DEFAULT, **kwargs
     )  # type: ignore
 
 
-def create_direct(*args: Any, **kwargs: Any) -> zhaires.Task:
+def create_direct(*args: Any, **kwargs: Any) -> "zhaires.Task":
     """
     Create a direct shower using the `direct_default.inp` file
     and using the direct ZHAireS version compiled by anchor.
@@ -218,26 +339,20 @@ def create_direct(*args: Any, **kwargs: Any) -> zhaires.Task:
     """
 
     # make sure default, and program are not in kwargs
-    if "default" in kwargs.keys():
+    if "default" in kwargs:
         raise ValueError(f"Cannot overide `default` file in create_direct.")
-    if "program" in kwargs.keys():
+    if "program" in kwargs:
         raise ValueError(f"Cannot overide `program` in create_direct.")
 
-    # the location of the ZHAires default input file
-    default = join(dirname(dirname(__file__)), *("defaults", "direct_default.inp"))
-
-    # and the location of the corresponding Aires binary
-    program = join(
-        dirname(dirname(__file__)), *("aires", "aires_direct_install", "bin", "Aires")
-    )
+    # the location of the corresponding Aires binary
+    program = _AIRES_BINARIES[("direct", "Aires")]
 
     # check that the program exists
-    if not op.exists(program):
-        raise ValueError(f"Unable to find {program}")
+    _assert_program(program)
 
     # and then call create_shower with the given default card
     return create_shower(
-        *args, program=program, default=default, **kwargs
+        *args, program=program, default=_DIRECT_DEFAULT, **kwargs
     )  # type: ignore
 
 
@@ -255,7 +370,7 @@ def create_stratospheric(
     restart: bool = False,
     geographic_azimuth: bool = False,
     **kwargs: Any,
-) -> zhaires.Task:
+) -> "zhaires.Task":
     """
     Create a new ZHAireS simulation of a stratospheric CR event
     with a given set of parameters.
@@ -265,6 +380,10 @@ def create_stratospheric(
 
     Do not use without contacting @rprechelt first.
 
+    Like `create_shower`, this changes the current working directory
+    to the simulation directory so each shower should be run before
+    the next shower is created.
+
     Parameters
     ----------
     name: str
@@ -295,52 +414,34 @@ def create_stratospheric(
     sim: zhaires.Task
         The created ZHAires simulation that can be run with `sim.run()`.
     """
-
-    # the location of the ZHAires default input file
-    default = join(
-        dirname(dirname(__file__)), *("defaults", "stratospheric_default.inp")
-    )
+    import zhaires
+    from zhaires.path import get_run_directory
 
     # if program exists, use that name
     pname = "AiresQ" if kwargs.get("model") == "AiresQ" else "Aires"
 
-    # the binary directory for the stratospheric ZHAireS version
-    bindir = join(
-        dirname(dirname(__file__)), *("aires", "aires_stratospheric_install", "bin")
-    )
-
     # and the location of the corresponding Aires binary
-    program = join(bindir, pname)
+    program = _AIRES_BINARIES[("stratospheric", pname)]
+
+    # check that the program exists
+    _assert_program(program)
 
     # create the simulation directory name
-    directory = join(get_run_directory(), f"{name}")
+    directory = join(get_run_directory(), name)
 
-    # create the output directory
-    try:
-        os.makedirs(directory, exist_ok=True)
-    except Exception as e:
-        if restart:
-            print("Simulation directory exists. Restarting...")
-        else:
-            print(e)
-            raise ValueError("Simulation already exists. Quitting...")
+    # and create the output directory
+    _create_directory(directory, restart)
 
-    # change to the sim directory
+    # change to the sim directory - Aires writes its status and scratch
+    # files into its working directory and zhaires.Task.run() does not
+    # accept one, so we leave the process in the most recent sim directory
     os.chdir(directory)
 
     # create a new simulation using the ANITA defaults
-    sim = zhaires.Task(program=program, cmdfile=default)
-
-    # the common defaults file
-    common_default = join(
-        dirname(dirname(__file__)), *("defaults", "common_default.inp")
-    )
-
-    # create a new simulation using the ANITA defaults
-    sim = zhaires.Task(program=program, cmdfile=common_default)
+    sim = zhaires.Task(program=program, cmdfile=_COMMON_DEFAULT)
 
     # and load any additional settings from the user provided file
-    sim.load_from_file(default)
+    sim.load_from_file(_STRATOSPHERIC_DEFAULT)
 
     # set the name of the task
     sim.task_name(name)
@@ -348,22 +449,14 @@ def create_stratospheric(
     # specify the output directory
     sim.file_directory(directory, "All")
 
-    # we must specify the path to the RASPASS binary
-    # that creates the special particles
-    raspass = join(bindir, "RASPASSprimary")
-
-    # and create the three special primary definitions
-    for particle in ["Proton", "Iron", "Electron"]:
-        sim(f"AddSpecialParticle RASPASS{particle} {raspass} {particle}")
+    # create the three special primary definitions using the RASPASS binary
+    # (we must not reuse `particle` here as it is the requested primary)
+    for primary in ("Proton", "Iron", "Electron"):
+        sim(f"AddSpecialParticle RASPASS{primary} {_RASPASS_BINARY} {primary}")
 
     # get the name of RASSPAS primary
-    if particle.lower() == "proton":
-        special = "RASPASSProton"
-    elif particle.lower() == "iron":
-        special = "RASPASSIron"
-    elif particle.lower() == "electron":
-        special = "RASPASSElectron"
-    else:
+    special = _RASPASS_PRIMARIES.get(particle.lower())
+    if special is None:
         msg = (
             f"stratospheric showers are only supported "
             "for 'proton', 'iron', and 'electron' primaries."
@@ -37,7 +37,7 @@ setup(
     install_requires=['numpy', 'igrf',
                       'zhaires @ git+git://github.com/rprechelt/zhaires.py'],
     extras_require={
-        "test": ["pytest", "black", "mypy",
+        "test": ["pytest", "pytest-xdist", "black", "mypy",
                  "coverage", "pytest-cov", "flake8"],
     },
     scripts=["scripts/anchor"],
@@ -1,38 +1,47 @@
 #!/usr/bin/env python3
-import os
-import os.path as op
-import shutil
+from pathlib import Path
+from typing import Any, Callable
 
-# the directory where we store showers
-SHOWER_DIR = f"{op.join(op.dirname(__file__), 'showers')}"
+import pytest
 
-# setup the environment before importing anchor
-os.environ["AIRES_RUN_DIR"] = SHOWER_DIR
+import anchor
 
-import anchor  # noqa:
 
-
-def delete_showers() -> None:
+@pytest.fixture
+def run_directory(tmp_path: Path, monkeypatch: Any) -> Path:
     """
-    Delete any created test showers.
+    Store any showers created by a test in its own temporary directory.
+
+    This keeps tests independent so they can be run in parallel
+    with `pytest -n auto`.
     """
 
-    # get a list of directories inside the shower dir
-    dirs = os.listdir(SHOWER_DIR)
+    # point Aires at the temporary directory for this test
+    monkeypatch.setenv("AIRES_RUN_DIR", str(tmp_path))
+
+    # and run from it so parallel tests never share a working directory
+    monkeypatch.chdir(tmp_path)
 
-    # delete all the showers
-    for d in dirs:
-        shutil.rmtree(op.join(SHOWER_DIR, d))
+    return tmp_path
 
 
-def test_create_direct() -> None:
+@pytest.mark.parametrize(
+    "name, create",
+    [
+        ("anchor_test_direct_shower", anchor.create_direct),
+        ("anchor_test_reflected_shower", anchor.create_reflected),
+    ],
+)
+def test_create_shower(
+    name: str, create: Callable[..., Any], run_directory: Path
+) -> None:
     """
-    Test that I can create a direct shower.
+    Test that I can create and run direct and reflected showers.
     """
 
     # check that I can create a shower
-    sim = anchor.create_direct(
-        "anchor_test_direct_shower",
+    sim = create(
+        name,
         "proton",
         15.0,
         0.0,
@@ -48,18 +57,20 @@ def test_create_direct() -> None:
     # run the shower
     sim.run()
 
-    # and delete the evidence
-    delete_showers()
-
 
-def test_create_reflected() -> None:
+def test_run_leaves_cwd_clean(run_directory: Path, monkeypatch: Any) -> None:
     """
-    Test that I can create a reflected shower.
+    Test that running a shower does not write into the caller's directory.
     """
 
-    # check that I can create a shower
-    sim = anchor.create_reflected(
-        "anchor_test_reflected_shower",
+    # run the shower from an empty working directory
+    cwd = run_directory / "cwd"
+    cwd.mkdir()
+    monkeypatch.chdir(cwd)
+
+    # create and run a shower
+    sim = anchor.create_direct(
+        "anchor_test_cwd_shower",
         "proton",
         15.0,
         0.0,
@@ -69,11 +80,8 @@ def test_create_reflected() -> None:
         date="2013-12-30",
         ground=1.0,
         thinning=1e-1,
-        restart=True,
     )
-
-    # run the shower
     sim.run()
 
-    # and delete the evidence
-    delete_showers()
+    # and check that nothing was written into the original directory
+    assert list(cwd.iterdir()) == []